@@ -4,15 +4,19 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import numpy as np
-import time
 
 # Import our custom modules
 from utils.news_fetcher import NewsFetcher
 from utils.sentiment_analyzer import SentimentAnalyzer  
 from utils.claude_analyzer import ClaudeAnalyzer
-from config import STOCKS
+from utils.cassette import CassetteStore
+from utils.alert_engine import AlertEngine
+from utils.embedding_index import EmbeddingIndex
+from utils.refresh_scheduler import RefreshScheduler, news_velocity
+from utils.request_budget import newsapi_budget
+from config import STOCKS, REFRESH_POLL_SECONDS, PRICE_HISTORY_PERIOD, PRICE_CHART_DAYS
 
 # Page config - DARK THEME
 st.set_page_config(
@@ -126,77 +130,165 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'data_loaded' not in st.session_state:
-    st.session_state.data_loaded = False
-if 'sentiment_data' not in st.session_state:
-    st.session_state.sentiment_data = None
-if 'market_data' not in st.session_state:
-    st.session_state.market_data = None
+if 'seen_version' not in st.session_state:
+    st.session_state.seen_version = None
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def load_market_data(symbols):
-    """Load real-time market data"""
+@st.cache_resource
+def get_alert_engine():
+    """One alert engine shared by every session, fed as fresh data is loaded"""
+    return AlertEngine()
+
+@st.cache_resource
+def get_refresh_scheduler():
+    """One scheduler, and one copy of the data, shared by every session"""
+    return RefreshScheduler(budget=newsapi_budget)
+
+@st.cache_resource
+def get_sentiment_analyzer():
+    """Load FinBERT once per process rather than on every news refresh"""
+    return SentimentAnalyzer()
+
+def empty_sentiment(symbol):
+    """Sentiment entry for a symbol with no news"""
+    return {
+        'summary': {
+            'symbol': symbol,
+            'avg_sentiment': 0,
+            'total_articles': 0,
+            'positive_count': 0,
+            'negative_count': 0,
+            'neutral_count': 0
+        },
+        'articles': [],
+        'index': None
+    }
+
+def refresh_market_data(scheduler, symbols):
+    """Fetch prices and company info for the symbols that are due"""
+    cassette = CassetteStore()
+    
+    due = scheduler.claim_due('prices', symbols)
+    try:
+        for symbol in due:
+            try:
+                ticker = yf.Ticker(symbol)
+                hist = cassette.call('yfinance', {'symbol': symbol, 'call': 'history', 'period': PRICE_HISTORY_PERIOD},
+                                     lambda: ticker.history(period=PRICE_HISTORY_PERIOD))
+                get_alert_engine().on_bars(symbol, hist)
+                scheduler.update('prices', symbol, hist,
+                                 fingerprint=(hist.index[-1], float(hist['Close'].iloc[-1]), float(hist['Volume'].iloc[-1])))
+            except Exception as e:
+                scheduler.fail('prices', symbol)
+                st.error(f"Error loading data for {symbol}: {e}")
+    finally:
+        scheduler.release('prices', due)
+    
+    due = scheduler.claim_due('info', symbols)
+    try:
+        for symbol in due:
+            try:
+                ticker = yf.Ticker(symbol)
+                info = cassette.call('yfinance', {'symbol': symbol, 'call': 'info'},
+                                     lambda: ticker.info)
+                scheduler.update('info', symbol, info, fingerprint=info.get('marketCap', 0))
+            except Exception as e:
+                scheduler.fail('info', symbol)
+                st.error(f"Error loading company info for {symbol}: {e}")
+    finally:
+        scheduler.release('info', due)
+
+def load_market_data(scheduler, symbols):
+    """Build market metrics from the latest refreshed prices and info"""
     market_data = {}
     for symbol in symbols:
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="5d")
-            info = ticker.info
-            
-            current_price = hist['Close'].iloc[-1]
-            prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-            change = current_price - prev_close
-            change_pct = (change / prev_close) * 100
-            
-            market_data[symbol] = {
-                'current_price': current_price,
-                'change': change,
-                'change_pct': change_pct,
-                'volume': hist['Volume'].iloc[-1],
-                'market_cap': info.get('marketCap', 0),
-                'hist': hist
-            }
-        except Exception as e:
-            st.error(f"Error loading data for {symbol}: {e}")
+        hist = scheduler.get('prices', symbol)
+        if hist is None or hist.empty:
+            continue
+        info = scheduler.get('info', symbol) or {}
+        
+        current_price = hist['Close'].iloc[-1]
+        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
+        change = current_price - prev_close
+        change_pct = (change / prev_close) * 100
+        
+        market_data[symbol] = {
+            'current_price': current_price,
+            'change': change,
+            'change_pct': change_pct,
+            'volume': hist['Volume'].iloc[-1],
+            'market_cap': info.get('marketCap', 0),
+            'hist': hist.tail(PRICE_CHART_DAYS)
+        }
             
     return market_data
 
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
-def load_sentiment_data():
-    """Load and analyze sentiment data"""
-    with st.spinner("🤖 AI is analyzing market sentiment..."):
-        news_fetcher = NewsFetcher()
-        sentiment_analyzer = SentimentAnalyzer()
-        
-        all_sentiment_data = {}
-        
-        for symbol in STOCKS:
-            # Get news
-            articles = news_fetcher.get_stock_news(symbol, days_back=3)
+def refresh_sentiment_data(scheduler, symbols):
+    """Fetch and analyze news for the symbols that are due"""
+    due = scheduler.claim_due('news', symbols)
+    if not due:
+        return
+    
+    # Streamlit stops the script on reruns; don't leave these symbols claimed forever
+    try:
+        with st.spinner("🤖 AI is analyzing market sentiment..."):
+            news_fetcher = NewsFetcher()
+            sentiment_analyzer = get_sentiment_analyzer()
             
-            if articles:
-                # Analyze sentiment
-                analyzed = sentiment_analyzer.analyze_articles(articles)
-                summary = sentiment_analyzer.get_stock_sentiment_summary(analyzed, symbol)
-                
-                all_sentiment_data[symbol] = {
-                    'summary': summary,
-                    'articles': analyzed[:5]  # Top 5 articles
-                }
-            else:
-                all_sentiment_data[symbol] = {
-                    'summary': {
-                        'symbol': symbol,
-                        'avg_sentiment': 0,
-                        'total_articles': 0,
-                        'positive_count': 0,
-                        'negative_count': 0,
-                        'neutral_count': 0
-                    },
-                    'articles': []
-                }
+            analyzed_by_symbol = {symbol: [] for symbol in due}
+            indexes = {}
+            
+            try:
+                # Score each page of news as it arrives instead of waiting for every symbol
+                # Pace extra pages over every tracked symbol, not just this batch
+                intervals = scheduler.intervals('news', symbols)
+                for symbol, articles in news_fetcher.stream_stock_news(due, days_back=3,
+                                                                       refresh_intervals=intervals):
+                    if not articles:
+                        continue
+                    
+                    # Analyze sentiment
+                    analyzed, embeddings = sentiment_analyzer.analyze_articles(articles, return_embeddings=True)
+                    get_alert_engine().on_articles(analyzed)
+                    
+                    # Index every article for related-news lookups and theme clustering
+                    if symbol not in indexes:
+                        indexes[symbol] = EmbeddingIndex(embeddings.shape[1])
+                    indexes[symbol].add(analyzed, embeddings)
+                    analyzed_by_symbol[symbol].extend(analyzed)
+            except Exception as e:
+                st.error(f"Error analyzing news: {e}")
+            
+            for symbol in due:
+                analyzed = analyzed_by_symbol[symbol]
                 
-    return all_sentiment_data
+                if analyzed:
+                    summary = sentiment_analyzer.get_stock_sentiment_summary(analyzed, symbol)
+                    scheduler.update('news', symbol, {
+                        'summary': summary,
+                        'articles': analyzed[:5],  # Top 5 articles
+                        'index': indexes[symbol]
+                    }, fingerprint=tuple(a['url'] for a in analyzed), velocity=news_velocity(analyzed))
+                elif scheduler.get('news', symbol) is None:
+                    scheduler.update('news', symbol, empty_sentiment(symbol), fingerprint=(), velocity=0)
+                else:
+                    # Nothing came back; keep showing the last good data. If the quota is
+                    # spent, don't retry before it resets
+                    retry_in = newsapi_budget.seconds_until_reset() if newsapi_budget.remaining() == 0 else None
+                    scheduler.fail('news', symbol, retry_in=retry_in)
+    finally:
+        scheduler.release('news', due)
+
+def load_sentiment_data(scheduler, symbols):
+    """Latest sentiment data for every symbol"""
+    return {symbol: scheduler.get('news', symbol) or empty_sentiment(symbol) for symbol in symbols}
+
+@st.fragment(run_every=REFRESH_POLL_SECONDS)
+def poll_for_updates():
+    """Rerun the page only when new data has landed or a refresh is due"""
+    scheduler = get_refresh_scheduler()
+    if (scheduler.version() != st.session_state.seen_version
+            or scheduler.any_due(('prices', 'news', 'info'), STOCKS)):
+        st.rerun()
 
 def create_sentiment_gauge(sentiment_score, symbol):
     """Create a cool sentiment gauge"""
@@ -321,25 +413,32 @@ def main():
         
         selected_stock = st.selectbox("🎯 Select Stock", STOCKS, index=0)
         
-        if st.button("🚀 REFRESH DATA", use_container_width=True):
-            st.cache_data.clear()
-            st.rerun()
+        scheduler = get_refresh_scheduler()
         
-        auto_refresh = st.checkbox("⚡ Auto-refresh (30s)")
+        if st.button("🚀 REFRESH DATA", use_container_width=True):
+            # Only the selected stock; everyone else's cached data stays warm
+            scheduler.invalidate(selected_stock)
         
-        if auto_refresh:
-            time.sleep(30)
-            st.rerun()
+        auto_refresh = st.checkbox("⚡ Auto-refresh")
     
-    # Load data
-    if not st.session_state.data_loaded:
-        with st.spinner("🔄 Loading market data..."):
-            st.session_state.market_data = load_market_data(STOCKS)
-            st.session_state.sentiment_data = load_sentiment_data()
-            st.session_state.data_loaded = True
+    # Refresh whatever is due, then render from the shared data
+    with st.spinner("🔄 Loading market data..."):
+        refresh_market_data(scheduler, STOCKS)
+    refresh_sentiment_data(scheduler, STOCKS)
     
-    market_data = st.session_state.market_data
-    sentiment_data = st.session_state.sentiment_data
+    st.session_state.seen_version = scheduler.version()
+    market_data = load_market_data(scheduler, STOCKS)
+    sentiment_data = load_sentiment_data(scheduler, STOCKS)
+    
+    # Alert feed
+    with st.sidebar:
+        st.markdown("### 🚨 ALERTS")
+        alerts = get_alert_engine().recent_alerts()
+        if not alerts:
+            st.caption("No alerts triggered yet")
+        for alert in alerts:
+            st.markdown(f"**{alert['symbol']}** · {alert['rule']}  \n"
+                        f"`{alert['metric']} = {alert['value']:.2f}` · {alert['event_time']}")
     
     # Top metrics row
     cols = st.columns(4)
@@ -390,11 +489,24 @@ def main():
         
         if st.button("🧠 Generate Claude Analysis"):
             with st.spinner("Claude is thinking..."):
-                claude_analyzer = ClaudeAnalyzer()
-                analysis = claude_analyzer.generate_stock_summary(
-                    selected_stock, 
-                    sentiment_data[selected_stock]['articles']
-                )
+                # Reuse the shared analysis until it is due or this stock's news changes
+                analysis = scheduler.get('analysis', selected_stock)
+                claimed = scheduler.claim_due('analysis', [selected_stock])
+                try:
+                    if claimed or analysis is None:
+                        claude_analyzer = ClaudeAnalyzer()
+                        index = sentiment_data[selected_stock]['index']
+                        analysis = claude_analyzer.generate_stock_summary(
+                            selected_stock, 
+                            sentiment_data[selected_stock]['articles'],
+                            themes=index.themes() if index else None
+                        )
+                        if analysis.startswith("Error"):
+                            scheduler.fail('analysis', selected_stock)
+                        else:
+                            scheduler.update('analysis', selected_stock, analysis)
+                finally:
+                    scheduler.release('analysis', claimed)
                 
                 # Style based on sentiment
                 sentiment_score = sentiment_data[selected_stock]['summary']['avg_sentiment']
@@ -410,6 +522,12 @@ def main():
     # Recent news section
     st.markdown("### 📰 RECENT NEWS SENTIMENT")
     
+    if newsapi_budget.remaining() == 0:
+        updated_at = scheduler.updated_at('news', selected_stock)
+        as_of = f"{datetime.fromtimestamp(updated_at, timezone.utc):%H:%M} UTC" if updated_at else "never"
+        st.warning(f"NewsAPI daily quota used up. News last refreshed: {as_of}. "
+                   f"Refreshes resume at {newsapi_budget.reset_time():%H:%M} UTC.")
+    
     if selected_stock in sentiment_data and sentiment_data[selected_stock]['articles']:
         for article in sentiment_data[selected_stock]['articles'][:3]:
             sentiment = article['sentiment_score']
@@ -422,8 +540,27 @@ def main():
                     st.write(f"**Published:** {article['published_at'][:10]}")
                     st.write(article['description'])
                     st.markdown(f"[Read Full Article]({article['url']})")
+                    
+                    index = sentiment_data[selected_stock]['index']
+                    related = index.related(article['url']) if index else []
+                    if related:
+                        st.write("**Related coverage:**")
+                        for other, similarity in related:
+                            st.markdown(f"- [{other['title'][:80]}]({other['url']}) · {other['source']} ({similarity:.2f})")
                 with col2:
                     st.metric("Sentiment", f"{sentiment:.2f}", f"{article['label'].title()}")
+    
+    # News themes
+    index = sentiment_data.get(selected_stock, {}).get('index')
+    if index and len(index) > 1:
+        st.markdown("### 🧩 NEWS THEMES")
+        for theme in index.themes():
+            emoji = "🟢" if theme['avg_sentiment'] > 0.1 else "🔴" if theme['avg_sentiment'] < -0.1 else "🟡"
+            st.write(f"{emoji} **{theme['headline'][:90]}** · {theme['article_count']} articles, "
+                     f"sentiment {theme['avg_sentiment']:.2f}")
+
+    if auto_refresh:
+        poll_for_updates()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,7 +7,10 @@ load_dotenv()
 
 # API Keys - works both locally and on Streamlit Cloud
 try:
-    # Try Streamlit secrets first (for cloud deployment)
+    # Try Streamlit secrets first (for cloud deployment). Check for a secrets file
+    # up front, since reading a missing one renders an error on the page
+    if not st.secrets.load_if_toml_exists():
+        raise FileNotFoundError("No secrets.toml")
     NEWS_API_KEY = st.secrets["NEWS_API_KEY"]
     CLAUDE_API_KEY = st.secrets["CLAUDE_API_KEY"]
 except:
@@ -23,3 +26,58 @@ NEWS_SOURCES = [
     'reuters', 'bloomberg', 'cnbc', 'financial-times', 
     'the-wall-street-journal', 'business-insider'
 ]
+
+# Record/replay harness for NewsAPI, yfinance and Claude (off | record | replay)
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')
+CASSETTE_DIR = os.getenv('CASSETTE_DIR', 'cassettes')
+# Replay latency in ms; leave unset to replay the latency observed while recording
+REPLAY_LATENCY_MS = os.getenv('REPLAY_LATENCY_MS')
+REPLAY_ERROR_RATE = float(os.getenv('REPLAY_ERROR_RATE', '0'))
+
+# Streaming alerts on sentiment and price thresholds
+ALERT_SENTIMENT_WINDOW = 24 * 3600  # Seconds of articles in the mean sentiment
+ALERT_BURST_WINDOW = 6 * 3600       # Seconds to count negative articles over
+ALERT_PRICE_WINDOW = 20             # Bars of returns behind the price z-score
+PRICE_HISTORY_PERIOD = '3mo'        # Daily bars fetched; enough to fill the z-score window
+PRICE_CHART_DAYS = 5
+ALERT_MIN_ARTICLES = 3              # Articles needed before mean sentiment can alert
+ALERT_RULES = [
+    {'name': 'Bearish sentiment', 'metric': 'mean_sentiment', 'op': '<=', 'threshold': -0.3},
+    {'name': 'Bullish sentiment', 'metric': 'mean_sentiment', 'op': '>=', 'threshold': 0.3},
+    {'name': 'Negative news burst', 'metric': 'negative_burst', 'op': '>=', 'threshold': 3},
+    {'name': 'Unusual price move', 'metric': 'price_zscore', 'op': 'abs>=', 'threshold': 2.0},
+]
+ALERT_LOG_FILE = os.getenv('ALERT_LOG_FILE', 'alerts.jsonl')
+ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')
+
+# FinBERT batching and the local news embedding index
+SENTIMENT_BATCH_SIZE = 16
+EMBEDDING_LSH_TABLES = 4   # More tables find more neighbours at the cost of memory
+EMBEDDING_LSH_BITS = 8     # Bits per table; 2**bits buckets each
+EMBEDDING_MAX_THEMES = 5
+EMBEDDING_MIN_SIMILARITY = 0.3    # Floor for "related"; each index also calibrates above its own background
+EMBEDDING_BACKGROUND_STDS = 3.0   # How far above the typical pairwise similarity a neighbour must be
+
+# NewsAPI paging and daily quota (defaults match the free developer plan)
+NEWS_DEEP_FETCH = os.getenv('NEWS_DEEP_FETCH', 'true').lower() == 'true'
+NEWS_API_DAILY_QUOTA = int(os.getenv('NEWS_API_DAILY_QUOTA', '100'))
+NEWS_API_RESERVE = 0.25         # Share of the quota kept back from extra pages
+NEWS_API_MAX_PAGE_SIZE = 100
+# Deepest result the plan will page to. The free plan's 100 allows no pages beyond the
+# first 100-article page; raise it on a paid plan to enable deep fetching.
+NEWS_API_MAX_RESULTS = int(os.getenv('NEWS_API_MAX_RESULTS', '100'))
+NEWS_MAX_PAGES = 5              # Per symbol, per refresh
+NEWS_PRIORITY = {}              # Extra weight for symbols that matter most, e.g. {'NVDA': 2.0}
+
+# Refresh cadence per data type, in seconds (stretched outside US market hours)
+REFRESH_INTERVALS = {
+    'prices': 60,
+    'news': 1800,
+    'info': 86400,
+    'analysis': 3600,   # Claude summaries, also refreshed whenever a symbol's news changes
+}
+REFRESH_OFF_HOURS_FACTOR = {'prices': 15, 'news': 2}
+NEWS_VELOCITY_BASELINE = 2.0        # Articles/hour at which news refreshes at its base interval
+NEWS_REFRESH_BOUNDS = (600, 7200)   # Fastest and slowest adaptive news refresh
+REFRESH_RETRY_SECONDS = 60
+REFRESH_POLL_SECONDS = 5            # How often auto-refresh checks for new data
@@ -0,0 +1,128 @@
+"""Load-test the dashboard by simulating concurrent sessions against recorded data.
+
+Record cassettes once with real API keys:
+    CASSETTE_MODE=record python load_test.py --sessions 1
+
+Then replay them as often as needed:
+    python load_test.py --sessions 50 --concurrency 10 --latency-ms 200 --error-rate 0.05
+
+AppTest keeps its runtime in a process-wide global, so sessions can't share a
+process while they run. Each of the `--concurrency` workers is a separate
+process that runs its sessions one after another. Like a fresh server process,
+a worker loads the model and fills its refresh caches on its first session.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions")
+    parser.add_argument('--sessions', type=int, default=20, help="Total sessions to simulate")
+    parser.add_argument('--concurrency', type=int, default=5, help="Sessions running at once (one process each)")
+    parser.add_argument('--latency-ms', type=float, help="Fixed replay latency (default: as recorded)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of replayed calls that fail")
+    parser.add_argument('--cold', action='store_true',
+                        help="Drop the worker's refresh data, models and alert state before every session")
+    parser.add_argument('--timeout', type=float, default=300, help="Per-page timeout in seconds")
+    return parser.parse_args()
+
+
+def run_session(args, stocks):
+    """Walk through one dashboard session and time every page render"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # Safe here: this worker process runs nothing else while the session runs
+    if args.cold:
+        st.cache_resource.clear()
+
+    timings = []
+    errors = 0
+
+    def timed(label, action):
+        """Run one page, counting timeouts and crashes as errors; returns None if it raised"""
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            at = action()
+        except Exception as e:
+            at = None
+            print(f"{label} failed: {e}")
+        timings.append((label, time.perf_counter() - start))
+        if at is None or at.exception:
+            errors += 1
+        return at
+
+    at = AppTest.from_file('app.py', default_timeout=args.timeout)
+    at = timed('initial_load', at.run)
+    if at is None:
+        return timings, errors
+
+    # Switch to another stock, then ask Claude about it
+    if at.selectbox:
+        symbol = random.choice(stocks)
+        at = timed('select_stock', lambda: at.selectbox[0].select(symbol).run())
+        if at is None:
+            return timings, errors
+
+    claude_buttons = [b for b in at.button if 'Claude' in b.label]
+    if claude_buttons:
+        at = timed('claude_analysis', lambda: claude_buttons[0].click().run())
+
+    return timings, errors
+
+
+def report(results, wall_time):
+    """Print p50/p95/p99 page latency overall and per interaction"""
+    by_label = {}
+    total_errors = 0
+    for timings, errors in results:
+        total_errors += errors
+        for label, elapsed in timings:
+            by_label.setdefault(label, []).append(elapsed)
+
+    all_samples = [t for samples in by_label.values() for t in samples]
+    rows = [('all pages', all_samples)] + sorted(by_label.items())
+
+    print(f"\n{len(results)} sessions, {len(all_samples)} pages in {wall_time:.1f}s "
+          f"({total_errors} pages failed)")
+    print(f"{'page':<18}{'n':>6}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}")
+    for label, samples in rows:
+        if not samples:
+            continue
+        p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+        print(f"{label:<18}{len(samples):>6}{p50:>12.1f}{p95:>12.1f}{p99:>12.1f}")
+
+
+def main():
+    args = parse_args()
+
+    # Configure the cassette layer before config.py is first imported
+    os.environ.setdefault('CASSETTE_MODE', 'replay')
+    if args.latency_ms is not None:
+        os.environ['REPLAY_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['REPLAY_ERROR_RATE'] = str(args.error_rate)
+
+    from config import STOCKS, CASSETTE_MODE
+    print(f"Running {args.sessions} sessions ({args.concurrency} concurrent), cassette mode: {CASSETTE_MODE}")
+
+    start = time.perf_counter()
+    # Spawn rather than fork so workers don't inherit torch or Streamlit state
+    context = multiprocessing.get_context('spawn')
+    # AppTest installs app.py as __main__ in the worker, so refer to the session by module name
+    from load_test import run_session
+    with ProcessPoolExecutor(max_workers=args.concurrency, mp_context=context) as pool:
+        futures = [pool.submit(run_session, args, STOCKS) for _ in range(args.sessions)]
+        results = [f.result() for f in futures]
+
+    report(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
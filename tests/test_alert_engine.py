@@ -0,0 +1,185 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import ALERT_PRICE_WINDOW
+from utils.alert_engine import AlertEngine, CountWindow, TimeWindow
+
+HOUR = 3600
+
+
+def article(url, hours, score, symbol='AAPL'):
+    return {'symbol': symbol, 'url': url, 'published_at': hours * HOUR, 'sentiment_score': score}
+
+
+def test_time_window_evicts_events_that_arrived_out_of_order():
+    window = TimeWindow(24 * HOUR)
+    window.add(30 * HOUR, 0.5)
+    window.add(10 * HOUR, -0.9)
+    window.add(40 * HOUR, -0.5)
+
+    assert [t for t, _, _ in window.events] == [30 * HOUR, 40 * HOUR]
+    assert window.mean() == 0.0
+
+
+def test_time_window_keeps_late_events_sorted():
+    window = TimeWindow(24 * HOUR)
+    for hours in (5, 9, 7, 8, 6):
+        window.add(hours * HOUR)
+
+    assert [t for t, _, _ in window.events] == [h * HOUR for h in (5, 6, 7, 8, 9)]
+    assert window.count() == 5
+
+
+def test_time_window_rejects_events_older_than_the_window():
+    window = TimeWindow(6 * HOUR)
+    window.add(20 * HOUR)
+
+    assert not window.add(10 * HOUR)
+    assert window.count() == 1
+
+
+def test_count_window_matches_plain_statistics():
+    window = CountWindow(3)
+    for value in (1.0, 2.0, 3.0, 10.0):
+        window.add(value)
+
+    assert window.count() == 3
+    assert window.mean() == 5.0
+    assert abs(window.std() - 4.358898943540674) < 1e-9
+
+
+def test_mean_sentiment_ignores_articles_outside_the_window_after_out_of_order_feed():
+    engine = AlertEngine(rules=[], sinks=[])
+    engine.on_article(article('a', 30, 0.0))
+    engine.on_article(article('b', 10, -0.9))
+    engine.on_article(article('c', 40, 0.0))
+
+    state = engine.states['AAPL']
+    assert state.sentiment.count() == 2
+    assert state.sentiment.mean() == 0.0
+
+
+def test_negative_burst_only_counts_articles_within_the_burst_window_of_the_head():
+    engine = AlertEngine(rules=[], sinks=[])
+    engine.on_article(article('head', 30, 0.5))
+    engine.on_article(article('old-negative', 20, -0.9))
+    engine.on_article(article('recent-negative', 27, -0.9))
+
+    state = engine.states['AAPL']
+    assert state.negative.count() == 1
+    # Still within the 24h sentiment window
+    assert state.sentiment.count() == 3
+
+
+def test_repeated_articles_are_ignored():
+    engine = AlertEngine(rules=[], sinks=[])
+    engine.on_article(article('a', 1, -0.5))
+    engine.on_article(article('a', 1, -0.5))
+
+    assert engine.states['AAPL'].sentiment.count() == 1
+
+
+def test_rules_fire_once_and_rearm():
+    rules = [{'name': 'Burst', 'metric': 'negative_burst', 'op': '>=', 'threshold': 2}]
+    engine = AlertEngine(rules=rules, sinks=[])
+
+    assert engine.on_article(article('a', 0, -0.5)) == []
+    assert [a['rule'] for a in engine.on_article(article('b', 1, -0.5))] == ['Burst']
+    assert engine.on_article(article('c', 2, -0.5)) == []
+    # Both negatives age out, re-arming the rule
+    assert engine.on_article(article('d', 20, 0.5)) == []
+    engine.on_article(article('e', 21, -0.5))
+    assert len(engine.on_article(article('f', 22, -0.5))) == 1
+    assert len(engine.recent_alerts()) == 2
+
+
+def test_per_event_cost_stays_well_under_a_millisecond_at_thousands_of_symbols():
+    engine = AlertEngine(sinks=[])
+    symbols = [f"S{i}" for i in range(5000)]
+    events = 50000
+
+    start = time.perf_counter()
+    for i in range(events):
+        symbol = symbols[i % len(symbols)]
+        if i % 2:
+            engine.on_article(article(f"u{i}", i / 100, (i % 7 - 3) / 3, symbol=symbol))
+        else:
+            engine.on_bar(symbol, i * 60, 100 + (i % 11))
+    per_event = (time.perf_counter() - start) / events
+
+    assert per_event < 1e-3
+
+
+def test_price_zscore_uses_completed_bars_and_rescores_the_current_bar():
+    rules = [{'name': 'Move', 'metric': 'price_zscore', 'op': 'abs>=', 'threshold': 2.0}]
+    engine = AlertEngine(rules=rules, sinks=[])
+    closes = [100 + day % 2 for day in range(ALERT_PRICE_WINDOW + 2)]
+    for day, close in enumerate(closes):
+        engine.on_bar('AAPL', day * 86400, close)
+
+    state = engine.states['AAPL']
+    # The newest bar is still open, so only the completed returns are in the window
+    assert state.returns.count() == ALERT_PRICE_WINDOW
+
+    # Same bar, new intraday close: re-scored instead of dropped
+    today = (len(closes) - 1) * 86400
+    alerts = engine.on_bar('AAPL', today, 90)
+    assert [a['rule'] for a in alerts] == ['Move']
+    assert state.returns.count() == ALERT_PRICE_WINDOW
+
+    # Unchanged close and older bars are ignored
+    assert engine.on_bar('AAPL', today, 90) == []
+    assert engine.on_bar('AAPL', 0, 50) == []
+
+
+def test_price_zscore_waits_for_a_full_window_of_returns():
+    engine = AlertEngine(sinks=[])
+    for day in range(ALERT_PRICE_WINDOW):
+        engine.on_bar('AAPL', day * 86400, 100 + day % 2)
+        assert engine.states['AAPL'].price_zscore is None
+
+    engine.on_bar('AAPL', ALERT_PRICE_WINDOW * 86400, 150)
+    assert engine.states['AAPL'].price_zscore is None
+
+    engine.on_bar('AAPL', (ALERT_PRICE_WINDOW + 1) * 86400, 150)
+    assert engine.states['AAPL'].price_zscore is not None
+
+
+def test_backfill_seeds_windows_without_alerting():
+    engine = AlertEngine(sinks=[])
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2024-01-01', periods=65, freq='B', tz='UTC')
+    now = days[-1].timestamp()
+
+    for s in range(8):
+        symbol = f"S{s}"
+        hist = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.03, len(days))))}, index=days)
+        assert engine.on_bars(symbol, hist) == []
+        # Three days of news that would trip every article rule
+        articles = [{'symbol': symbol, 'url': f"{symbol}/{i}", 'published_at': now - i * HOUR,
+                     'sentiment_score': -0.9} for i in range(72)]
+        assert engine.on_articles(articles) == []
+        assert engine.states[symbol].returns.count() == ALERT_PRICE_WINDOW
+
+    assert engine.recent_alerts() == []
+
+    # Re-sending the same history stays quiet; only newer events can fire
+    assert engine.on_bars('S7', hist) == []
+    assert engine.on_articles(articles) == []
+    alerts = engine.on_bar('S7', now + 86400, float(hist['Close'].iloc[-1]) * 2)
+    assert [a['metric'] for a in alerts] == ['price_zscore']
+
+
+def test_only_articles_newer_than_the_last_batch_can_alert():
+    rules = [{'name': 'Burst', 'metric': 'negative_burst', 'op': '>=', 'threshold': 2}]
+    engine = AlertEngine(rules=rules, sinks=[])
+    assert engine.on_articles([article('a', 10, 0.5)]) == []
+
+    # Older, late-arriving negatives count but don't alert
+    assert engine.on_articles([article('b', 8, -0.5), article('c', 9, -0.5)]) == []
+    engine.on_articles([article('d', 11, 0.5), article('e', 20, 0.5)])
+
+    alerts = engine.on_articles([article('f', 21, -0.5), article('g', 22, -0.5)])
+    assert [a['rule'] for a in alerts] == ['Burst']
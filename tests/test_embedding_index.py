@@ -0,0 +1,64 @@
+import numpy as np
+
+from utils.embedding_index import EmbeddingIndex
+
+DIM = 64
+
+
+def anisotropic_corpus(n_noise=60, n_topic=6, seed=0):
+    """Vectors shaped like mean-pooled transformer states: a big shared direction plus noise,
+    with a few articles also sharing a topic direction"""
+    rng = np.random.default_rng(seed)
+    common = rng.standard_normal(DIM) * 5
+    topic = rng.standard_normal(DIM) * 2
+    vectors = common + rng.standard_normal((n_noise + n_topic, DIM))
+    vectors[n_noise:] += topic
+    articles = [{'url': f"u{i}", 'title': f"t{i}", 'source': 's', 'sentiment_score': 0.0}
+                for i in range(n_noise + n_topic)]
+    return articles, vectors.astype(np.float16)
+
+
+def test_related_ignores_noise_neighbours_of_anisotropic_vectors():
+    articles, vectors = anisotropic_corpus()
+    index = EmbeddingIndex(DIM)
+    index.add(articles, vectors)
+
+    # A pure-noise article has nothing related to it
+    assert index.related('u0') == []
+
+    # A topical article finds the others on its topic
+    related = index.related('u60', k=3)
+    assert len(related) == 3
+    assert all(int(article['url'][1:]) >= 60 for article, _ in related)
+
+
+def test_centring_spreads_vectors_across_lsh_buckets():
+    articles, vectors = anisotropic_corpus()
+    index = EmbeddingIndex(DIM)
+    index.add(articles, vectors)
+
+    assert min(len(table) for table in index.buckets) > 20
+
+
+def test_incremental_adds_match_a_single_add():
+    articles, vectors = anisotropic_corpus()
+    whole = EmbeddingIndex(DIM)
+    whole.add(articles, vectors)
+    paged = EmbeddingIndex(DIM)
+    paged.add(articles[:30], vectors[:30])
+    paged.add(articles[30:], vectors[30:])
+
+    assert paged.matrix.dtype == np.float16
+    assert np.array_equal(paged.matrix, whole.matrix)
+    assert paged.url_to_row == whole.url_to_row
+
+
+def test_themes_cover_every_article_largest_first():
+    articles, vectors = anisotropic_corpus()
+    index = EmbeddingIndex(DIM)
+    index.add(articles, vectors)
+
+    themes = index.themes(max_themes=4)
+    assert sum(theme['article_count'] for theme in themes) == len(articles)
+    counts = [theme['article_count'] for theme in themes]
+    assert counts == sorted(counts, reverse=True)
@@ -0,0 +1,56 @@
+import pytest
+
+from utils import news_fetcher
+from utils.news_fetcher import NewsFetcher
+from utils.request_budget import RequestBudget
+
+SYMBOLS = ['S%d' % i for i in range(8)]
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    """NewsFetcher on its own budget, serving 5 full pages of results for every symbol"""
+    monkeypatch.setattr(news_fetcher, 'NEWS_API_MAX_RESULTS', 500)
+    fetcher = NewsFetcher()
+    fetcher.budget = RequestBudget(100, reserve=20)
+    fetcher.pages = []
+
+    def fetch_symbol_page(symbol, days_back, page=1, page_size=20):
+        fetcher.budget.acquire()
+        fetcher.pages.append((symbol, page))
+        articles = [{'title': 't', 'description': 'd', 'url': f"{symbol}/{page}/{i}",
+                     'publishedAt': '2024-01-01T00:00:00Z', 'source': {'name': 's'}}
+                    for i in range(page_size)]
+        return {'totalResults': 500, 'articles': articles}
+
+    monkeypatch.setattr(fetcher, '_fetch_symbol_page', fetch_symbol_page)
+    return fetcher
+
+
+def extra_pages(fetcher):
+    return sum(1 for _, page in fetcher.pages if page > 1)
+
+
+def test_staggered_single_symbol_refreshes_are_paced_over_every_tracked_symbol(fetcher):
+    # Every symbol is due four more times before the reset
+    intervals = dict.fromkeys(SYMBOLS, fetcher.budget.seconds_until_reset() / 4)
+
+    for symbol in SYMBOLS:
+        list(fetcher.stream_stock_news([symbol], deep=True, refresh_intervals=intervals))
+
+    # One pass over every symbol spends at most a quarter of the spendable budget
+    assert extra_pages(fetcher) <= (100 - 20) / 4
+
+
+def test_batch_and_single_symbol_refreshes_are_paced_alike(fetcher):
+    intervals = dict.fromkeys(SYMBOLS, fetcher.budget.seconds_until_reset() / 2)
+
+    list(fetcher.stream_stock_news(SYMBOLS, deep=True, refresh_intervals=intervals))
+    batched = extra_pages(fetcher)
+
+    fetcher.budget = RequestBudget(100, reserve=20)
+    fetcher.pages = []
+    for symbol in SYMBOLS:
+        list(fetcher.stream_stock_news([symbol], deep=True, refresh_intervals=intervals))
+
+    assert abs(extra_pages(fetcher) - batched) <= len(SYMBOLS)
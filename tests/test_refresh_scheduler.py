@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from config import REFRESH_INTERVALS, REFRESH_RETRY_SECONDS
+from utils import refresh_scheduler
+from utils.refresh_scheduler import RefreshScheduler
+from utils.request_budget import RequestBudget
+
+
+@pytest.fixture(autouse=True)
+def market_open(monkeypatch):
+    monkeypatch.setattr(refresh_scheduler, 'market_is_open', lambda now=None: True)
+
+
+def due_in(scheduler, data_type, symbol):
+    return scheduler.entries[(data_type, symbol)].next_due - time.time()
+
+
+def test_claims_are_exclusive_until_resolved():
+    scheduler = RefreshScheduler()
+
+    assert scheduler.claim_due('prices', ['AAPL', 'TSLA']) == ['AAPL', 'TSLA']
+    assert scheduler.claim_due('prices', ['AAPL', 'TSLA']) == []
+    assert not scheduler.any_due(('prices',), ['AAPL', 'TSLA'])
+
+    scheduler.update('prices', 'AAPL', 'data', fingerprint=1)
+    scheduler.release('prices', ['TSLA'])
+
+    # Updated data waits for its interval; a released claim is immediately due again
+    assert scheduler.claim_due('prices', ['AAPL', 'TSLA']) == ['TSLA']
+    assert due_in(scheduler, 'prices', 'AAPL') == pytest.approx(REFRESH_INTERVALS['prices'], abs=1)
+
+
+def test_fail_retries_soon_or_after_the_given_delay():
+    scheduler = RefreshScheduler()
+    scheduler.claim_due('prices', ['AAPL'])
+    scheduler.fail('prices', 'AAPL')
+    assert due_in(scheduler, 'prices', 'AAPL') == pytest.approx(REFRESH_RETRY_SECONDS, abs=1)
+
+    scheduler.claim_due('info', ['AAPL'])
+    scheduler.fail('info', 'AAPL', retry_in=5000)
+    assert due_in(scheduler, 'info', 'AAPL') == pytest.approx(5000, abs=1)
+
+
+def test_invalidate_only_touches_one_symbol():
+    scheduler = RefreshScheduler()
+    for symbol in ('AAPL', 'TSLA'):
+        scheduler.claim_due('news', [symbol])
+        scheduler.update('news', symbol, symbol, fingerprint=symbol)
+
+    scheduler.invalidate('AAPL')
+
+    assert scheduler.claim_due('news', ['AAPL', 'TSLA']) == ['AAPL']
+    assert scheduler.claim_due('prices', ['AAPL']) == ['AAPL']
+
+
+def test_version_moves_only_when_content_changes():
+    scheduler = RefreshScheduler()
+    scheduler.update('prices', 'AAPL', 'v1', fingerprint=1)
+    version = scheduler.version()
+
+    scheduler.update('prices', 'AAPL', 'v1 again', fingerprint=1)
+    assert scheduler.version() == version
+    assert scheduler.get('prices', 'AAPL') == 'v1'
+
+    scheduler.update('prices', 'AAPL', 'v2', fingerprint=2)
+    assert scheduler.version() == version + 1
+    assert scheduler.get('prices', 'AAPL') == 'v2'
+
+
+def test_news_change_makes_analysis_due():
+    scheduler = RefreshScheduler()
+    scheduler.update('analysis', 'AAPL', 'summary')
+    scheduler.update('news', 'AAPL', 'n1', fingerprint=('a',))
+    scheduler.update('analysis', 'AAPL', 'summary')
+    assert scheduler.claim_due('analysis', ['AAPL']) == []
+
+    scheduler.update('news', 'AAPL', 'n2', fingerprint=('a', 'b'))
+    assert scheduler.claim_due('analysis', ['AAPL']) == ['AAPL']
+
+
+def test_news_interval_follows_velocity_within_bounds():
+    scheduler = RefreshScheduler()
+    scheduler.update('news', 'FAST', 'x', fingerprint=1, velocity=100.0)
+    scheduler.update('news', 'QUIET', 'x', fingerprint=1, velocity=0)
+
+    assert scheduler.interval('news', 'FAST') == 600
+    assert scheduler.interval('news', 'QUIET') == 7200
+
+
+def test_news_interval_is_stretched_to_fit_the_remaining_budget():
+    budget = RequestBudget(100)
+    scheduler = RefreshScheduler(budget=budget)
+    symbols = ['S%d' % i for i in range(8)]
+    scheduler.claim_due('news', symbols)
+
+    expected = budget.seconds_until_reset() * len(symbols) / budget.remaining()
+    assert scheduler.interval('news', 'S0') == pytest.approx(max(expected, 1800), rel=0.01)
+
+    budget.exhaust()
+    assert scheduler.interval('news', 'S0') == pytest.approx(budget.seconds_until_reset(), abs=1)
+    # Other data types are not tied to the news budget
+    assert scheduler.interval('prices', 'S0') == REFRESH_INTERVALS['prices']
+
+
+def test_intervals_reports_each_symbols_current_interval():
+    scheduler = RefreshScheduler()
+    scheduler.update('news', 'FAST', 'x', fingerprint=1, velocity=100.0)
+
+    assert scheduler.intervals('news', ['FAST', 'NEW']) == {'FAST': 600, 'NEW': REFRESH_INTERVALS['news']}
@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from utils.request_budget import QuotaExhausted, RequestBudget
+
+
+def test_acquire_counts_down_and_raises_when_spent():
+    budget = RequestBudget(2)
+    budget.acquire()
+    budget.acquire()
+
+    assert budget.remaining() == 0
+    with pytest.raises(QuotaExhausted):
+        budget.acquire()
+
+
+def test_quota_resets_on_a_new_utc_day():
+    budget = RequestBudget(5)
+    budget.exhaust()
+    budget.day = date(2000, 1, 1)
+
+    assert budget.remaining() == 5
+    assert 0 < budget.seconds_until_reset() <= 86400
+
+
+def test_allocate_never_exceeds_demand_or_spendable_budget():
+    budget = RequestBudget(100, reserve=20)
+
+    allocation = budget.allocate({'NVDA': 3, 'TSLA': 200}, {'NVDA': 900, 'TSLA': 100})
+
+    assert allocation['NVDA'] == 3
+    assert allocation['TSLA'] == 77
+    assert sum(allocation.values()) == 80
+
+
+def test_allocate_splits_in_proportion_to_weight():
+    budget = RequestBudget(14, reserve=0)
+
+    allocation = budget.allocate({'A': 10, 'B': 10, 'C': 10}, {'A': 3, 'B': 1, 'C': 0})
+
+    assert allocation == {'A': 10, 'B': 4, 'C': 0}
+    assert budget.allocate({'A': 10, 'B': 10}, {'A': 3, 'B': 1}, refreshes_left=2) == {'A': 6, 'B': 1}
+
+
+def test_allocate_paces_budget_across_remaining_refreshes():
+    budget = RequestBudget(100, reserve=20)
+
+    allocation = budget.allocate({'A': 50}, {'A': 1}, refreshes_left=8)
+
+    assert allocation['A'] == 10
+    # Leaves the rest of the day's budget for later refreshes
+    assert budget.remaining() == 100
+
+
+def test_allocate_gives_nothing_once_only_the_reserve_is_left():
+    budget = RequestBudget(10, reserve=5)
+    for _ in range(5):
+        budget.acquire()
+
+    assert budget.allocate({'A': 3}, {'A': 1}) == {'A': 0}
@@ -0,0 +1,361 @@
+import json
+import math
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+import requests
+from config import (ALERT_RULES, ALERT_SENTIMENT_WINDOW, ALERT_BURST_WINDOW, ALERT_PRICE_WINDOW,
+                    ALERT_MIN_ARTICLES, ALERT_LOG_FILE, ALERT_WEBHOOK_URL)
+
+# Metrics fed by each event type, so an event only re-evaluates the rules it can affect
+ARTICLE_METRICS = ('mean_sentiment', 'negative_burst')
+BAR_METRICS = ('price_zscore',)
+
+OPERATORS = {
+    '<': lambda value, threshold: value < threshold,
+    '<=': lambda value, threshold: value <= threshold,
+    '>': lambda value, threshold: value > threshold,
+    '>=': lambda value, threshold: value >= threshold,
+    'abs>=': lambda value, threshold: abs(value) >= threshold,
+}
+
+
+def to_timestamp(value):
+    """Convert an ISO string, datetime or pandas Timestamp to epoch seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value.timestamp()
+
+
+class TimeWindow:
+    """Running sum/count over events within `seconds` of the newest event.
+
+    Events are kept sorted by timestamp. Late events are inserted from the
+    right, which stays O(1) amortized because they are rare and land near the
+    end. Events already older than the window are rejected.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.events = deque()
+        self.total = 0.0
+        self.latest = None
+
+    def advance(self, timestamp):
+        """Move the window's end forward to `timestamp`, returning the evicted events"""
+        if self.latest is None or timestamp > self.latest:
+            self.latest = timestamp
+        cutoff = self.latest - self.seconds
+        evicted = []
+        while self.events and self.events[0][0] < cutoff:
+            event = self.events.popleft()
+            self.total -= event[1]
+            evicted.append(event)
+        return evicted
+
+    def covers(self, timestamp):
+        """Whether an event at `timestamp` would still fall inside the window"""
+        return self.latest is None or timestamp >= self.latest - self.seconds
+
+    def add(self, timestamp, value=1.0, key=None):
+        """Add an event, returning False if it is already outside the window"""
+        self.advance(timestamp)
+        if not self.covers(timestamp):
+            return False
+
+        event = (timestamp, value, key)
+        if not self.events or timestamp >= self.events[-1][0]:
+            self.events.append(event)
+        else:
+            position = len(self.events)
+            while position and self.events[position - 1][0] > timestamp:
+                position -= 1
+            self.events.insert(position, event)
+        self.total += value
+        return True
+
+    def count(self):
+        return len(self.events)
+
+    def mean(self):
+        return self.total / len(self.events) if self.events else 0.0
+
+
+class CountWindow:
+    """Running mean/std over the last `size` values, updated in O(1)"""
+
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, value):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    def count(self):
+        return len(self.values)
+
+    def mean(self):
+        return self.total / len(self.values) if self.values else 0.0
+
+    def std(self):
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class SymbolState:
+    """Sliding-window aggregates for one symbol"""
+
+    def __init__(self):
+        self.sentiment = TimeWindow(ALERT_SENTIMENT_WINDOW)
+        self.negative = TimeWindow(ALERT_BURST_WINDOW)
+        self.seen = TimeWindow(max(ALERT_SENTIMENT_WINDOW, ALERT_BURST_WINDOW))
+        self.seen_urls = set()
+
+        self.returns = CountWindow(ALERT_PRICE_WINDOW)
+        self.last_bar_time = None
+        self.prev_close = None
+        self.last_close = None
+        self.price_zscore = None
+
+        self.active_rules = set()
+
+    def metric(self, name):
+        if name == 'mean_sentiment':
+            if self.sentiment.count() < ALERT_MIN_ARTICLES:
+                return None
+            return self.sentiment.mean()
+        if name == 'negative_burst':
+            return self.negative.count()
+        if name == 'price_zscore':
+            return self.price_zscore
+        return None
+
+
+class AlertEngine:
+    """Evaluate alert rules incrementally as scored articles and price bars arrive.
+
+    Each symbol keeps O(1)-update window aggregates; an event only touches its
+    own symbol and only re-checks the rules whose metric it changed. Rules fire
+    once when they start matching and re-arm when they stop.
+
+    Backfilled events (history loaded on startup, or anything no newer than
+    what the engine has already seen for a symbol) update the windows and rule
+    state but never alert, so restarts don't re-announce weeks-old moves.
+    """
+
+    def __init__(self, rules=None, sinks=None, feed_size=50):
+        self.rules_by_metric = {}
+        for rule in (ALERT_RULES if rules is None else rules):
+            if rule['op'] not in OPERATORS:
+                raise ValueError(f"Unknown operator in alert rule {rule['name']}: {rule['op']}")
+            self.rules_by_metric.setdefault(rule['metric'], []).append(rule)
+
+        self.states = {}
+        self.feed = deque(maxlen=feed_size)
+        self.sinks = default_sinks() if sinks is None else sinks
+        self.lock = threading.Lock()
+
+    def _state(self, symbol):
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = SymbolState()
+        return state
+
+    def on_article(self, article, backfill=False):
+        """Feed one scored article from SentimentAnalyzer"""
+        symbol = article['symbol']
+        timestamp = to_timestamp(article['published_at'])
+
+        with self.lock:
+            state = self._state(symbol)
+
+            # Forget URLs that have left every window, then skip repeats
+            for _, _, url in state.seen.advance(timestamp):
+                state.seen_urls.discard(url)
+            if article['url'] in state.seen_urls:
+                return []
+            # Each window judges lateness against its own span, so a late
+            # article can still count towards the mean but not the burst
+            if not state.seen.add(timestamp, key=article['url']):
+                return []
+            state.seen_urls.add(article['url'])
+
+            score = article['sentiment_score']
+            state.sentiment.add(timestamp, score)
+            state.negative.advance(timestamp)
+            if score < -0.1:
+                state.negative.add(timestamp)
+
+            alerts = self._evaluate(symbol, state, ARTICLE_METRICS, timestamp, backfill)
+
+        self._deliver(alerts)
+        return alerts
+
+    def on_articles(self, articles):
+        """Feed a batch of scored articles, oldest first.
+
+        Only articles newer than anything already seen for their symbol can
+        alert; the first batch for a symbol is backfill.
+        """
+        with self.lock:
+            seen_until = {article['symbol']: self._state(article['symbol']).seen.latest
+                          for article in articles}
+
+        alerts = []
+        for article in sorted(articles, key=lambda a: a['published_at']):
+            latest = seen_until[article['symbol']]
+            backfill = latest is None or to_timestamp(article['published_at']) <= latest
+            alerts.extend(self.on_article(article, backfill=backfill))
+        return alerts
+
+    def on_bar(self, symbol, timestamp, close, backfill=False):
+        """Feed one closing price.
+
+        A newer bar commits the previous bar's return to the window. A repeat
+        of the current bar with a different close (e.g. today's daily bar on
+        an intraday refresh) re-scores the current move. Older bars are ignored.
+        The move is only scored once the window holds ALERT_PRICE_WINDOW returns.
+        """
+        timestamp = to_timestamp(timestamp)
+
+        with self.lock:
+            state = self._state(symbol)
+
+            if state.last_bar_time is None or timestamp > state.last_bar_time:
+                if state.prev_close:
+                    state.returns.add(state.last_close / state.prev_close - 1)
+                state.prev_close = state.last_close
+                state.last_bar_time = timestamp
+            elif timestamp < state.last_bar_time or close == state.last_close:
+                return []
+            state.last_close = close
+
+            # Score the current move against the completed bars before it
+            std = state.returns.std()
+            if state.returns.count() >= ALERT_PRICE_WINDOW and std > 0:
+                change = close / state.prev_close - 1
+                state.price_zscore = (change - state.returns.mean()) / std
+            else:
+                state.price_zscore = None
+
+            alerts = self._evaluate(symbol, state, BAR_METRICS, timestamp, backfill)
+
+        self._deliver(alerts)
+        return alerts
+
+    def on_bars(self, symbol, hist):
+        """Feed a yfinance history frame for a symbol.
+
+        Only the current bar and newer ones can alert; the first frame for a
+        symbol is backfill.
+        """
+        with self.lock:
+            seen_until = self._state(symbol).last_bar_time
+
+        alerts = []
+        for timestamp, close in hist['Close'].items():
+            backfill = seen_until is None or to_timestamp(timestamp) < seen_until
+            alerts.extend(self.on_bar(symbol, timestamp, float(close), backfill=backfill))
+        return alerts
+
+    def _evaluate(self, symbol, state, metrics, timestamp, backfill=False):
+        """Update which rules match, returning alerts for those that just started to"""
+        alerts = []
+        for metric in metrics:
+            rules = self.rules_by_metric.get(metric)
+            if not rules:
+                continue
+            value = state.metric(metric)
+            for rule in rules:
+                matched = value is not None and OPERATORS[rule['op']](value, rule['threshold'])
+                key = rule['name']
+                if not matched:
+                    state.active_rules.discard(key)
+                elif key not in state.active_rules:
+                    state.active_rules.add(key)
+                    if backfill:
+                        continue
+                    alerts.append({
+                        'symbol': symbol,
+                        'rule': rule['name'],
+                        'metric': metric,
+                        'value': round(float(value), 4),
+                        'threshold': rule['threshold'],
+                        'event_time': datetime.fromtimestamp(timestamp).isoformat(timespec='seconds'),
+                        'triggered_at': datetime.now().isoformat(timespec='seconds'),
+                    })
+        return alerts
+
+    def _deliver(self, alerts):
+        if not alerts:
+            return
+        with self.lock:
+            self.feed.extendleft(alerts)
+        for alert in alerts:
+            for sink in self.sinks:
+                try:
+                    sink.send(alert)
+                except Exception as e:
+                    print(f"Error delivering alert to {type(sink).__name__}: {e}")
+
+    def recent_alerts(self, limit=10):
+        """Most recent alerts first, for the sidebar feed"""
+        with self.lock:
+            return list(self.feed)[:limit]
+
+
+class FileSink:
+    """Append alerts to a local JSON-lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def send(self, alert):
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(alert) + '\n')
+
+
+class WebhookSink:
+    """POST alerts to a webhook from a background thread so events never wait on the network"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def send(self, alert):
+        self.queue.put(alert)
+
+    def _worker(self):
+        while True:
+            alert = self.queue.get()
+            try:
+                requests.post(self.url, json=alert, timeout=self.timeout)
+            except Exception as e:
+                print(f"Error posting alert to webhook: {e}")
+
+
+def default_sinks():
+    """Sinks configured in config.py"""
+    sinks = []
+    if ALERT_LOG_FILE:
+        sinks.append(FileSink(ALERT_LOG_FILE))
+    if ALERT_WEBHOOK_URL:
+        sinks.append(WebhookSink(ALERT_WEBHOOK_URL))
+    return sinks
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import pickle
+import random
+import time
+from types import SimpleNamespace
+from config import CASSETTE_MODE, CASSETTE_DIR, REPLAY_LATENCY_MS, REPLAY_ERROR_RATE
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recording exists for a request"""
+
+
+class InjectedError(Exception):
+    """Synthetic failure raised in replay mode to simulate a flaky service"""
+
+
+class CassetteStore:
+    """Record real responses from external services and replay them locally.
+
+    Modes:
+        off    - call the real service (default)
+        record - call the real service and save the response to disk
+        replay - serve saved responses with injected latency and errors
+    """
+
+    def __init__(self, mode=None, cassette_dir=None, latency_ms=None, error_rate=None):
+        self.mode = mode or CASSETTE_MODE
+        self.cassette_dir = cassette_dir or CASSETTE_DIR
+        latency_ms = REPLAY_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_ms = float(latency_ms) if latency_ms not in (None, '') else None
+        self.error_rate = REPLAY_ERROR_RATE if error_rate is None else error_rate
+
+        if self.mode not in ('off', 'record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {self.mode}")
+
+    def _path(self, service, key):
+        """Cassette file for a request, keyed by a stable hash of its parameters"""
+        raw = json.dumps(key, sort_keys=True, default=str)
+        digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+        return os.path.join(self.cassette_dir, service, f"{digest}.pkl")
+
+    def call(self, service, key, fetch):
+        """Run `fetch` through the cassette for the given service and request key"""
+        if self.mode == 'off':
+            return fetch()
+
+        path = self._path(service, key)
+
+        if self.mode == 'record':
+            start = time.perf_counter()
+            value = fetch()
+            elapsed = time.perf_counter() - start
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'key': key, 'value': value, 'elapsed': elapsed}, f)
+            os.replace(tmp_path, path)  # Atomic, so concurrent replays never see half a file
+            return value
+
+        # Replay
+        if not os.path.exists(path):
+            raise CassetteMiss(f"No {service} recording for {key}")
+
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+
+        delay = entry['elapsed'] if self.latency_ms is None else self.latency_ms / 1000
+        time.sleep(delay)
+
+        if random.random() < self.error_rate:
+            raise InjectedError(f"Injected {service} failure for {key}")
+
+        return entry['value']
+
+    def wrap_anthropic(self, client):
+        """Route an Anthropic client's messages.create through the cassette"""
+        if self.mode == 'off':
+            return client
+        return CassetteAnthropicClient(client, self)
+
+
+class CassetteAnthropicClient:
+    """Minimal stand-in for anthropic.Anthropic exposing messages.create"""
+
+    def __init__(self, client, cassette):
+        self.messages = _CassetteMessages(client, cassette)
+
+
+class _CassetteMessages:
+    def __init__(self, client, cassette):
+        self.client = client
+        self.cassette = cassette
+
+    def create(self, **kwargs):
+        def fetch():
+            message = self.client.messages.create(**kwargs)
+            # Keep only the text blocks so recordings don't depend on SDK classes
+            return SimpleNamespace(
+                content=[SimpleNamespace(text=block.text) for block in message.content]
+            )
+
+        return self.cassette.call('anthropic', kwargs, fetch)
@@ -1,14 +1,22 @@
 import anthropic
 from config import CLAUDE_API_KEY
+from utils.cassette import CassetteStore
 import json
 
 class ClaudeAnalyzer:
     def __init__(self):
+        self.cassette = CassetteStore()
         
-        self.client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+        # Replay never touches the API, so don't require a key for it
+        client = None if self.cassette.mode == 'replay' else anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+        self.client = self.cassette.wrap_anthropic(client)
     
-    def generate_stock_summary(self, symbol, analyzed_articles):
-        """Generate AI summary for a stock using Claude"""
+    def generate_stock_summary(self, symbol, analyzed_articles, themes=None):
+        """Generate AI summary for a stock using Claude
+        
+        When themes from EmbeddingIndex.themes() are given, Claude gets one
+        compact entry per local news cluster instead of raw articles.
+        """
         
         # Get articles for this symbol
         stock_articles = [a for a in analyzed_articles if a['symbol'] == symbol]
@@ -16,22 +24,33 @@ class ClaudeAnalyzer:
         if not stock_articles:
             return "No recent news found for this stock."
         
-        # Prepare article summaries for Claude
-        article_texts = []
-        for article in stock_articles[:10]:  # Limit to avoid token limits
-            article_texts.append({
-                'title': article['title'],
-                'description': article['description'],
-                'sentiment_score': round(article['sentiment_score'], 2),
-                'source': article['source'],
-                'date': article['published_at'][:10]
-            })
+        if themes:
+            news_label = "News Themes (clustered locally; headline is the most representative article)"
+            news_items = [{
+                'headline': theme['headline'],
+                'article_count': theme['article_count'],
+                'avg_sentiment': theme['avg_sentiment'],
+                'sources': theme['sources'][:5],
+                'other_headlines': [a['title'] for a in theme['articles'][1:3]]
+            } for theme in themes]
+        else:
+            # Prepare article summaries for Claude
+            news_label = "Recent News Articles"
+            news_items = []
+            for article in stock_articles[:10]:  # Limit to avoid token limits
+                news_items.append({
+                    'title': article['title'],
+                    'description': article['description'],
+                    'sentiment_score': round(article['sentiment_score'], 2),
+                    'source': article['source'],
+                    'date': article['published_at'][:10]
+                })
         
         prompt = f"""
         Analyze the recent news sentiment for {symbol} stock and provide a concise investment research summary.
 
-        Recent News Articles:
-        {json.dumps(article_texts, indent=2)}
+        {news_label}:
+        {json.dumps(news_items, indent=2)}
 
         Please provide:
         1. **Overall Sentiment**: Brief assessment of market sentiment
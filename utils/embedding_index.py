@@ -0,0 +1,147 @@
+import numpy as np
+from config import (EMBEDDING_LSH_TABLES, EMBEDDING_LSH_BITS, EMBEDDING_MAX_THEMES,
+                    EMBEDDING_MIN_SIMILARITY, EMBEDDING_BACKGROUND_STDS)
+
+
+class EmbeddingIndex:
+    """Article embeddings in a float16 matrix with a random-hyperplane LSH index.
+
+    Mean-pooled transformer states share a large common direction, so raw
+    cosine similarity is high for any pair of articles and hyperplanes through
+    the origin put most of them in one bucket. Vectors are therefore centred
+    on the corpus mean before they are normalised and hashed. The centred
+    matrix and buckets are rebuilt on every add, which is cheap for the
+    per-symbol indexes the dashboard keeps (a few hundred articles at most).
+
+    Lookups only rerank the articles sharing an LSH bucket with the query and
+    fall back to a full scan when the buckets come up short.
+    """
+
+    def __init__(self, dim, n_tables=EMBEDDING_LSH_TABLES, n_bits=EMBEDDING_LSH_BITS, seed=0):
+        self.dim = dim
+        self.articles = []
+        self.raw = np.zeros((0, dim), dtype=np.float16)
+        self.matrix = np.zeros((0, dim), dtype=np.float16)
+        self.url_to_row = {}
+        self.min_similarity = EMBEDDING_MIN_SIMILARITY
+
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_tables, n_bits, dim)).astype(np.float32)
+        self.bit_weights = 1 << np.arange(n_bits)
+        self.buckets = [{} for _ in range(n_tables)]
+
+    def _hash(self, vectors):
+        """Bucket ids of shape (n_tables, n_vectors)"""
+        bits = np.einsum('tbd,nd->tnb', self.planes, vectors) > 0
+        return bits @ self.bit_weights
+
+    def add(self, articles, embeddings):
+        """Append articles with their embeddings (one row per article)"""
+        if not articles:
+            return
+
+        for offset, article in enumerate(articles):
+            self.url_to_row[article['url']] = len(self.articles) + offset
+        self.articles.extend(articles)
+        self.raw = np.vstack([self.raw, np.asarray(embeddings, dtype=np.float16)])
+        self._rebuild()
+
+    def _rebuild(self):
+        """Re-centre, re-normalise and re-hash everything against the current corpus mean"""
+        vectors = self.raw.astype(np.float32)
+        vectors -= vectors.mean(axis=0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.maximum(norms, 1e-8)
+        self.matrix = vectors.astype(np.float16)
+
+        self.buckets = [{} for _ in self.buckets]
+        for table, keys in zip(self.buckets, self._hash(vectors)):
+            for row, key in enumerate(keys.tolist()):
+                table.setdefault(key, []).append(row)
+
+        self.min_similarity = self._calibrate(vectors)
+
+    def _calibrate(self, vectors, sample=256):
+        """Similarity an article must beat to count as related in this corpus.
+
+        Most pairs of articles are unrelated, so the spread of all pairwise
+        similarities is the background; neighbours have to stand clear of it.
+        """
+        if len(vectors) < 3:
+            return EMBEDDING_MIN_SIMILARITY
+        sample = vectors[:sample]
+        similarities = sample @ sample.T
+        background = similarities[~np.eye(len(sample), dtype=bool)]
+        threshold = background.mean() + EMBEDDING_BACKGROUND_STDS * background.std()
+        return max(EMBEDDING_MIN_SIMILARITY, float(threshold))
+
+    def __len__(self):
+        return len(self.articles)
+
+    def related(self, url, k=3, min_similarity=None):
+        """Articles most similar to the one at `url`, best first, as (article, similarity)"""
+        row = self.url_to_row.get(url)
+        if row is None:
+            return []
+
+        query = self.matrix[row].astype(np.float32)
+        candidates = set()
+        for table, key in zip(self.buckets, self._hash(query[None, :])[:, 0].tolist()):
+            candidates.update(table.get(key, ()))
+        candidates.discard(row)
+
+        if len(candidates) < k:
+            candidates = [r for r in range(len(self.articles)) if r != row]
+        candidates = np.fromiter(candidates, dtype=np.int64)
+        if not len(candidates):
+            return []
+
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+        similarities = self.matrix[candidates].astype(np.float32) @ query
+        order = np.argsort(-similarities)[:k]
+        return [(self.articles[candidates[i]], float(similarities[i]))
+                for i in order if similarities[i] >= min_similarity]
+
+    def themes(self, max_themes=EMBEDDING_MAX_THEMES, iterations=10):
+        """Cluster articles into themes with spherical k-means, largest theme first"""
+        n = len(self.articles)
+        if not n:
+            return []
+
+        vectors = self.matrix.astype(np.float32)
+        k = min(max_themes, max(1, n // 3))
+
+        # Farthest-point initialisation keeps the result deterministic
+        centroids = [vectors[0]]
+        for _ in range(1, k):
+            similarity = np.max(vectors @ np.array(centroids).T, axis=1)
+            centroids.append(vectors[np.argmin(similarity)])
+        centroids = np.array(centroids)
+
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(k):
+                members = vectors[assignment == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[c] = centroid / max(np.linalg.norm(centroid), 1e-8)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+
+        themes = []
+        for c in range(k):
+            rows = np.flatnonzero(assignment == c)
+            if not len(rows):
+                continue
+            # Members ordered by closeness to the centroid; the closest headlines the theme
+            closeness = vectors[rows] @ centroids[c]
+            members = [self.articles[r] for r in rows[np.argsort(-closeness)]]
+            themes.append({
+                'headline': members[0]['title'],
+                'article_count': len(members),
+                'avg_sentiment': round(float(np.mean([a['sentiment_score'] for a in members])), 2),
+                'sources': sorted({a['source'] for a in members}),
+                'articles': members
+            })
+
+        return sorted(themes, key=lambda t: t['article_count'], reverse=True)
@@ -1,16 +1,32 @@
 import requests
 import pandas as pd
 from datetime import datetime, timedelta
-from config import NEWS_API_KEY
+from config import (NEWS_API_KEY, NEWS_API_MAX_PAGE_SIZE, NEWS_API_MAX_RESULTS, NEWS_MAX_PAGES,
+                    NEWS_PRIORITY, NEWS_DEEP_FETCH, REFRESH_INTERVALS)
+from utils.cassette import CassetteStore
+from utils.request_budget import newsapi_budget, QuotaExhausted
+import math
 import time
 
 class NewsFetcher:
     def __init__(self):
         self.api_key = NEWS_API_KEY
         self.base_url = "https://newsapi.org/v2/everything"
+        self.cassette = CassetteStore()
+        self.budget = newsapi_budget
     
-    def get_stock_news(self, symbol, days_back=7):
-        """Fetch news for a specific stock symbol"""
+    def _fetch_page(self, params):
+        """Call NewsAPI once and return the decoded JSON payload"""
+        self.budget.acquire()
+        response = requests.get(self.base_url, params=params)
+        if response.status_code == 429:
+            # NewsAPI's own counter disagrees with ours; trust it for the rest of the day
+            self.budget.exhaust()
+        response.raise_for_status()
+        return response.json()
+    
+    def _fetch_symbol_page(self, symbol, days_back, page=1, page_size=20):
+        """Fetch one page of raw NewsAPI results for a symbol"""
         
         # Calculate date range
         to_date = datetime.now()
@@ -26,36 +42,117 @@ class NewsFetcher:
             'language': 'en',
             'sortBy': 'publishedAt',
             'apiKey': self.api_key,
-            'pageSize': 20  # Limit to avoid quota issues
+            'pageSize': page_size,
+            'page': page
         }
         
+        # Date range and key are left out so recordings replay on any day
+        cassette_key = {k: v for k, v in params.items() if k not in ('from', 'to', 'apiKey')}
+        
+        return self.cassette.call('newsapi', cassette_key, lambda: self._fetch_page(params))
+    
+    def _process_articles(self, symbol, articles):
+        """Keep articles with a title and description, in our standard format"""
+        processed_articles = []
+        for article in articles:
+            if article['title'] and article['description']:
+                processed_articles.append({
+                    'symbol': symbol,
+                    'title': article['title'],
+                    'description': article['description'],
+                    'content': article.get('content', ''),
+                    'url': article['url'],
+                    'published_at': article['publishedAt'],
+                    'source': article['source']['name']
+                })
+        return processed_articles
+    
+    def get_stock_news(self, symbol, days_back=7):
+        """Fetch news for a specific stock symbol"""
         try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            articles = data.get('articles', [])
-            
-            # Process articles
-            processed_articles = []
-            for article in articles:
-                if article['title'] and article['description']:
-                    processed_articles.append({
-                        'symbol': symbol,
-                        'title': article['title'],
-                        'description': article['description'],
-                        'content': article.get('content', ''),
-                        'url': article['url'],
-                        'published_at': article['publishedAt'],
-                        'source': article['source']['name']
-                    })
-            
-            return processed_articles
+            # Single page, limited to avoid quota issues
+            data = self._fetch_symbol_page(symbol, days_back)
+            return self._process_articles(symbol, data.get('articles', []))
             
         except Exception as e:
             print(f"Error fetching news for {symbol}: {e}")
             return []
     
+    def stream_stock_news(self, symbols, days_back=7, deep=NEWS_DEEP_FETCH, refresh_intervals=None):
+        """Yield (symbol, articles) one page at a time across symbols.
+        
+        Without `deep` this is one get_stock_news call per symbol. With it,
+        every symbol first gets one full-size page, which also reports how
+        much coverage exists. The extra pages the daily budget can afford are
+        then split across symbols by that volume times NEWS_PRIORITY, and
+        fetched heaviest first. Pages are yielded as they arrive so callers
+        can score them while the rest is still downloading.
+        
+        Extra pages are paced per symbol: `refresh_intervals` maps every
+        tracked symbol to the seconds between its news refreshes, and each
+        symbol refresh expected before the quota resets gets an equal share.
+        Callers that refresh symbols in separate batches must pass it for all
+        of them; by default only `symbols` are tracked, at the base interval.
+        """
+        if not deep:
+            for symbol in symbols:
+                yield symbol, self.get_stock_news(symbol, days_back)
+            return
+        
+        page_size = NEWS_API_MAX_PAGE_SIZE
+        max_results = min(NEWS_API_MAX_RESULTS, NEWS_MAX_PAGES * page_size)
+        seen_urls = {symbol: set() for symbol in symbols}
+        
+        def fresh(symbol, data):
+            # Paging by publishedAt shifts as new stories land, so drop repeats
+            articles = []
+            for article in self._process_articles(symbol, data.get('articles', [])):
+                if article['url'] not in seen_urls[symbol]:
+                    seen_urls[symbol].add(article['url'])
+                    articles.append(article)
+            return articles
+        
+        # Pass 1: first page for every symbol
+        volumes = {}
+        for symbol in symbols:
+            try:
+                data = self._fetch_symbol_page(symbol, days_back, page=1, page_size=page_size)
+            except QuotaExhausted as e:
+                print(f"Skipping news for {symbol}: {e}")
+                continue
+            except Exception as e:
+                print(f"Error fetching news for {symbol}: {e}")
+                continue
+            
+            volumes[symbol] = min(data.get('totalResults', 0), max_results)
+            yield symbol, fresh(symbol, data)
+        
+        # Pass 2: extra pages wherever the budget allows
+        demand = {symbol: math.ceil(volume / page_size) - 1 for symbol, volume in volumes.items()}
+        weights = {symbol: volume * NEWS_PRIORITY.get(symbol, 1.0) for symbol, volume in volumes.items()}
+        if refresh_intervals is None:
+            refresh_intervals = dict.fromkeys(symbols, REFRESH_INTERVALS['news'])
+        until_reset = self.budget.seconds_until_reset()
+        symbol_refreshes = sum(max(1.0, until_reset / seconds) for seconds in refresh_intervals.values())
+        # This call's symbols are its share of all the symbol refreshes left today
+        refreshes_left = max(1.0, symbol_refreshes / max(len(symbols), 1))
+        allocation = self.budget.allocate(demand, weights, refreshes_left=refreshes_left)
+        
+        for symbol in sorted(allocation, key=lambda s: weights[s], reverse=True):
+            for page in range(2, 2 + allocation[symbol]):
+                try:
+                    data = self._fetch_symbol_page(symbol, days_back, page=page, page_size=page_size)
+                except QuotaExhausted as e:
+                    print(f"Stopping deep fetch: {e}")
+                    return
+                except Exception as e:
+                    print(f"Error fetching page {page} of news for {symbol}: {e}")
+                    break
+                
+                if not data.get('articles'):
+                    break
+                yield symbol, fresh(symbol, data)
+    
     def get_company_name(self, symbol):
         """Map stock symbols to company names"""
         company_map = {
@@ -0,0 +1,179 @@
+import threading
+import time
+import pandas as pd
+from config import (REFRESH_INTERVALS, REFRESH_OFF_HOURS_FACTOR, REFRESH_RETRY_SECONDS,
+                    NEWS_VELOCITY_BASELINE, NEWS_REFRESH_BOUNDS)
+from utils.alert_engine import to_timestamp
+
+# Data that goes stale when another data type for the same symbol changes
+DEPENDENTS = {'news': ('analysis',)}
+
+
+def market_is_open(now=None):
+    """True during regular US trading hours (9:30-16:00 ET, Monday-Friday)"""
+    now = pd.Timestamp.now(tz='America/New_York') if now is None else now
+    if now.weekday() >= 5:
+        return False
+    minutes = now.hour * 60 + now.minute
+    return 9 * 60 + 30 <= minutes < 16 * 60
+
+
+def news_velocity(articles, hours=24):
+    """Articles per hour published over the last `hours`"""
+    cutoff = time.time() - hours * 3600
+    recent = 0
+    for article in articles:
+        try:
+            if to_timestamp(article['published_at']) >= cutoff:
+                recent += 1
+        except (KeyError, ValueError):
+            continue
+    return recent / hours
+
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.fingerprint = None
+        self.next_due = 0.0
+        self.in_flight = False
+        self.velocity = None
+        self.updated_at = None
+
+
+class RefreshScheduler:
+    """Decide what to refresh, per data type and symbol, and hold the latest data.
+
+    Each (data type, symbol) pair has its own due time. Prices refresh often,
+    news less often and company info/Claude analysis rarely. Outside market
+    hours the intervals stretch, and news intervals also shrink or grow with
+    how fast articles are being published for that symbol.
+
+    Given the NewsAPI RequestBudget, news refreshes are also spaced so the
+    remaining quota lasts every tracked symbol until it resets.
+
+    `version()` only moves when refreshed content actually changed, so the UI
+    can poll it cheaply and rerun only when there is something new to show.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.entries = {}
+        self.content_version = 0
+        self.lock = threading.Lock()
+
+    def _entry(self, data_type, symbol):
+        key = (data_type, symbol)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = _Entry()
+        return entry
+
+    def interval(self, data_type, symbol):
+        """Seconds until the next refresh of this data type for this symbol"""
+        seconds = REFRESH_INTERVALS[data_type]
+
+        if data_type == 'news':
+            velocity = self._entry(data_type, symbol).velocity
+            if velocity:
+                seconds *= NEWS_VELOCITY_BASELINE / velocity
+            elif velocity == 0:
+                seconds = NEWS_REFRESH_BOUNDS[1]
+            low, high = NEWS_REFRESH_BOUNDS
+            seconds = min(max(seconds, low), high)
+
+        if not market_is_open():
+            seconds *= REFRESH_OFF_HOURS_FACTOR.get(data_type, 1)
+
+        if data_type == 'news' and self.budget is not None:
+            seconds = max(seconds, self._budget_interval())
+
+        return seconds
+
+    def intervals(self, data_type, symbols):
+        """Current refresh interval for each symbol"""
+        with self.lock:
+            return {symbol: self.interval(data_type, symbol) for symbol in symbols}
+
+    def _budget_interval(self):
+        """Shortest news interval the remaining quota can sustain for every symbol"""
+        until_reset = self.budget.seconds_until_reset()
+        remaining = self.budget.remaining()
+        if remaining <= 0:
+            return until_reset
+        symbols = max(sum(1 for data_type, _ in self.entries if data_type == 'news'), 1)
+        return until_reset * symbols / remaining
+
+    def claim_due(self, data_type, symbols):
+        """Symbols due for a refresh, marked in flight so other sessions skip them"""
+        now = time.time()
+        claimed = []
+        with self.lock:
+            for symbol in symbols:
+                entry = self._entry(data_type, symbol)
+                if not entry.in_flight and entry.next_due <= now:
+                    entry.in_flight = True
+                    claimed.append(symbol)
+        return claimed
+
+    def any_due(self, data_types, symbols):
+        now = time.time()
+        with self.lock:
+            return any(
+                not entry.in_flight and entry.next_due <= now
+                for entry in (self._entry(t, s) for t in data_types for s in symbols)
+            )
+
+    def update(self, data_type, symbol, value, fingerprint=None, velocity=None):
+        """Store freshly loaded data and schedule the next refresh"""
+        with self.lock:
+            entry = self._entry(data_type, symbol)
+            entry.in_flight = False
+            if velocity is not None:
+                entry.velocity = velocity
+            entry.next_due = time.time() + self.interval(data_type, symbol)
+            entry.updated_at = time.time()
+
+            fingerprint = value if fingerprint is None else fingerprint
+            if entry.value is None or fingerprint != entry.fingerprint:
+                entry.value = value
+                entry.fingerprint = fingerprint
+                self.content_version += 1
+                for dependent in DEPENDENTS.get(data_type, ()):
+                    self._entry(dependent, symbol).next_due = 0.0
+
+    def fail(self, data_type, symbol, retry_in=None):
+        """Release a claim after a failed refresh and retry soon, or after `retry_in` seconds"""
+        with self.lock:
+            entry = self._entry(data_type, symbol)
+            entry.in_flight = False
+            if retry_in is None:
+                retry_in = min(REFRESH_RETRY_SECONDS, self.interval(data_type, symbol))
+            entry.next_due = time.time() + retry_in
+
+    def release(self, data_type, symbols):
+        """Drop claims that were never resolved, e.g. when a rerun interrupts a refresh"""
+        with self.lock:
+            for symbol in symbols:
+                self._entry(data_type, symbol).in_flight = False
+
+    def invalidate(self, symbol, data_types=None):
+        """Make one symbol's data due now, leaving every other symbol cached"""
+        with self.lock:
+            for data_type in (data_types or REFRESH_INTERVALS):
+                self._entry(data_type, symbol).next_due = 0.0
+
+    def get(self, data_type, symbol):
+        with self.lock:
+            entry = self.entries.get((data_type, symbol))
+            return entry.value if entry else None
+
+    def updated_at(self, data_type, symbol):
+        """Epoch seconds of the last successful refresh, or None"""
+        with self.lock:
+            entry = self.entries.get((data_type, symbol))
+            return entry.updated_at if entry else None
+
+    def version(self):
+        """Changes whenever any refreshed content changed"""
+        return self.content_version
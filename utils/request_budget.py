@@ -0,0 +1,89 @@
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+from config import NEWS_API_DAILY_QUOTA, NEWS_API_RESERVE
+
+
+class QuotaExhausted(Exception):
+    """Raised when the daily request budget has been spent"""
+
+
+class RequestBudget:
+    """Process-wide daily request counter for a rate-limited API.
+
+    The count resets at midnight UTC. A reserve is held back from deep
+    (paginated) fetches so routine first-page refreshes keep working.
+    """
+
+    def __init__(self, daily_quota, reserve=0):
+        self.daily_quota = daily_quota
+        self.reserve = reserve
+        self.used = 0
+        self.day = self._today()
+        self.lock = threading.Lock()
+
+    def _today(self):
+        return datetime.now(timezone.utc).date()
+
+    def _roll_over(self):
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+
+    def reset_time(self):
+        """When the quota next resets (midnight UTC)"""
+        tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+        return datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=timezone.utc)
+
+    def seconds_until_reset(self):
+        return max((self.reset_time() - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+    def remaining(self):
+        with self.lock:
+            self._roll_over()
+            return max(self.daily_quota - self.used, 0)
+
+    def acquire(self):
+        """Count one request, raising QuotaExhausted if none are left"""
+        with self.lock:
+            self._roll_over()
+            if self.used >= self.daily_quota:
+                raise QuotaExhausted(f"Daily quota of {self.daily_quota} requests used up")
+            self.used += 1
+
+    def exhaust(self):
+        """Mark the quota as spent, e.g. after the API answers 429"""
+        with self.lock:
+            self._roll_over()
+            self.used = self.daily_quota
+
+    def allocate(self, demand, weights, refreshes_left=1):
+        """Split this refresh's share of the budget across keys by weight.
+
+        `demand` is the most requests each key can use; `weights` typically
+        combine news volume and priority. The spendable budget is paced over
+        `refreshes_left` refreshes expected before the reset, so early
+        refreshes don't starve later ones. Uses highest-averages (D'Hondt)
+        apportionment, so no key gets more than it asked for and leftovers
+        flow to the next heaviest key.
+        """
+        spendable = int((self.remaining() - self.reserve) / max(refreshes_left, 1))
+        allocation = {key: 0 for key in demand}
+
+        heap = [(-weights.get(key, 0), key) for key, pages in demand.items()
+                if pages > 0 and weights.get(key, 0) > 0]
+        heapq.heapify(heap)
+
+        while spendable > 0 and heap:
+            _, key = heapq.heappop(heap)
+            allocation[key] += 1
+            spendable -= 1
+            if allocation[key] < demand[key]:
+                heapq.heappush(heap, (-weights[key] / (allocation[key] + 1), key))
+
+        return allocation
+
+
+# Shared by every NewsFetcher in the process
+newsapi_budget = RequestBudget(NEWS_API_DAILY_QUOTA, reserve=int(NEWS_API_DAILY_QUOTA * NEWS_API_RESERVE))
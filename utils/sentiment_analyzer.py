@@ -1,6 +1,8 @@
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
 import pandas as pd
 import numpy as np
+import torch
+from config import SENTIMENT_BATCH_SIZE
 
 class SentimentAnalyzer:
     def __init__(self):
@@ -8,18 +10,43 @@ class SentimentAnalyzer:
         model_name = "ProsusAI/finbert"
         
         try:
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis", 
-                model=model_name,
-                tokenizer=model_name
-            )
+            self._load_model(model_name)
             print("✅ FinBERT model loaded successfully!")
         except Exception as e:
             print(f"❌ Error loading FinBERT: {e}")
             # Fallback to general sentiment model
-            self.sentiment_pipeline = pipeline("sentiment-analysis")
+            self._load_model("distilbert-base-uncased-finetuned-sst-2-english")
             print("✅ Using fallback sentiment model")
     
+    def _load_model(self, model_name):
+        """Load tokenizer and model directly so batches can also return hidden states"""
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.sentiment_pipeline = pipeline(
+            "sentiment-analysis",
+            model=self.model,
+            tokenizer=self.tokenizer
+        )
+    
+    def _to_sentiment(self, label, score):
+        """Map a model label and confidence to the standardized sentiment format"""
+        label = label.lower()
+        
+        # Map labels to sentiment scores
+        if 'positive' in label or 'bullish' in label:
+            sentiment_score = score
+        elif 'negative' in label or 'bearish' in label:
+            sentiment_score = -score
+        else:  # neutral
+            sentiment_score = 0
+            
+        return {
+            'sentiment_score': sentiment_score,
+            'confidence': score,
+            'label': label
+        }
+    
     def analyze_text(self, text):
         """Analyze sentiment of a single text"""
         try:
@@ -29,22 +56,7 @@ class SentimentAnalyzer:
             result = self.sentiment_pipeline(text)[0]
             
             # Convert to standardized format
-            label = result['label'].lower()
-            score = result['score']
-            
-            # Map labels to sentiment scores
-            if 'positive' in label or 'bullish' in label:
-                sentiment_score = score
-            elif 'negative' in label or 'bearish' in label:
-                sentiment_score = -score
-            else:  # neutral
-                sentiment_score = 0
-                
-            return {
-                'sentiment_score': sentiment_score,
-                'confidence': score,
-                'label': label
-            }
+            return self._to_sentiment(result['label'], result['score'])
             
         except Exception as e:
             print(f"Error analyzing sentiment: {e}")
@@ -54,22 +66,70 @@ class SentimentAnalyzer:
                 'label': 'neutral'
             }
     
-    def analyze_articles(self, articles):
-        """Analyze sentiment for multiple articles"""
+    def _score_batch(self, texts):
+        """Score a batch of texts and mean-pool their last hidden layer into embeddings"""
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors='pt')
+        
+        # Grab the encoder's last hidden state on its way to the classifier head, so the
+        # model runs once and the other layers' states are never kept
+        captured = {}
+        hook = self.model.base_model.register_forward_hook(
+            lambda module, args, output: captured.update(hidden=output[0])
+        )
+        try:
+            with torch.no_grad():
+                logits = self.model(**inputs).logits
+        finally:
+            hook.remove()
+        
+        scores, label_ids = torch.softmax(logits, dim=-1).max(dim=-1)
+        sentiments = [
+            self._to_sentiment(self.model.config.id2label[label_id], score)
+            for label_id, score in zip(label_ids.tolist(), scores.tolist())
+        ]
+        
+        # Average over real tokens only, ignoring padding
+        mask = inputs['attention_mask'].unsqueeze(-1).float()
+        hidden = captured['hidden']
+        embeddings = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        
+        return sentiments, embeddings.numpy().astype(np.float16)
+    
+    def analyze_articles(self, articles, return_embeddings=False):
+        """Analyze sentiment for multiple articles in batches.
+        
+        With return_embeddings=True also returns a float16 matrix holding one
+        sentence embedding per article, computed in the same forward pass.
+        """
         results = []
+        embeddings = []
         
-        for article in articles:
-            # Combine title and description for analysis
-            text = f"{article['title']} {article['description']}"
+        for start in range(0, len(articles), SENTIMENT_BATCH_SIZE):
+            batch = articles[start:start + SENTIMENT_BATCH_SIZE]
             
-            sentiment = self.analyze_text(text)
+            # Combine title and description for analysis
+            texts = [f"{article['title']} {article['description']}"[:512] for article in batch]
             
-            result = {
-                **article,
-                **sentiment
-            }
+            try:
+                sentiments, batch_embeddings = self._score_batch(texts)
+            except Exception as e:
+                print(f"Error analyzing sentiment batch: {e}")
+                sentiments = [{'sentiment_score': 0, 'confidence': 0, 'label': 'neutral'}] * len(batch)
+                batch_embeddings = np.zeros((len(batch), self.model.config.hidden_size), dtype=np.float16)
             
-            results.append(result)
+            for article, sentiment in zip(batch, sentiments):
+                results.append({
+                    **article,
+                    **sentiment
+                })
+            embeddings.append(batch_embeddings)
+        
+        if return_embeddings:
+            if embeddings:
+                matrix = np.vstack(embeddings)
+            else:
+                matrix = np.zeros((0, self.model.config.hidden_size), dtype=np.float16)
+            return results, matrix
         
         return results
     